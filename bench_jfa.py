@@ -0,0 +1,73 @@
+"""
+
+    Radiance Cascades Experiments
+    https://github.com/kadir014/radiance-cascades-experiments
+
+"""
+
+from argparse import ArgumentParser
+from array import array
+from statistics import mean, median
+
+from src.engine import RadianceCascadesEngine
+from src.canvas import SceneCanvas
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Benchmark fragment and compute shader JFA distance field generation headlessly.")
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tolerance", type=float, default=1e-5, help="Largest allowed distance field difference between the backends.")
+    args = parser.parse_args()
+
+    resolution = (args.width, args.height)
+
+    engine = RadianceCascadesEngine(resolution, headless=True)
+
+    if not engine.compute_supported:
+        raise SystemExit("Compute shader JFA needs OpenGL 4.3.")
+
+    canvas = SceneCanvas(resolution)
+    canvas.populate(args.seed)
+    engine.update_color_scene(canvas.color)
+    engine.update_emissive_scene(canvas.emissive)
+
+    query = engine._context.query(time=True)
+    results = {}
+
+    print(f"Distance field generation at {resolution[0]}x{resolution[1]}, {args.frames} frames")
+    print("Both backends use RGBA32F JFA & distance field targets")
+
+    for name, compute in (("fragment", False), ("compute", True)):
+        engine.jfa_compute = compute
+
+        # Warm up, first dispatches include driver compilation & allocation
+        engine._df()
+        engine._context.finish()
+
+        timings = []
+        for _ in range(args.frames):
+            with query:
+                engine._df()
+            timings.append(query.elapsed / 1e6)
+
+        results[name] = (engine._df_target0.read(), engine._df_target1.read())
+
+        print(f"{name:>8}  mean: {round(mean(timings), 3)}ms  median: {round(median(timings), 3)}ms  min: {round(min(timings), 3)}ms")
+
+    # Both backends should produce the same distance fields
+    matching = True
+    for i in range(2):
+        fragment = array("f", results["fragment"][i])[::4]
+        compute = array("f", results["compute"][i])[::4]
+        max_diff = max(abs(a - b) for a, b in zip(fragment, compute))
+        mismatches = sum(1 for a, b in zip(fragment, compute) if a != b)
+        print(f"{('df', 'inverse df')[i]:>10}  mismatched pixels: {mismatches}  max difference: {max_diff}")
+
+        if max_diff > args.tolerance:
+            matching = False
+
+    if not matching:
+        raise SystemExit(f"Compute shader JFA differs from the fragment JFA by more than {args.tolerance}.")
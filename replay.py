@@ -0,0 +1,103 @@
+"""
+
+    Radiance Cascades Experiments
+    https://github.com/kadir014/radiance-cascades-experiments
+
+"""
+
+from argparse import ArgumentParser
+from statistics import mean, median
+from time import perf_counter, sleep
+
+import pygame
+
+from src.engine import RadianceCascadesEngine
+from src.canvas import SceneCanvas
+from src.recording import InputRecording, KeyEvent, StrokeEvent, EngineSettings
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Replay a session recorded with main.py --record and report frame timings.")
+    parser.add_argument("recording", help="Recording file to replay.")
+    parser.add_argument("--headless", action="store_true", help="Render offscreen without opening a window.")
+    parser.add_argument("--paced", action="store_true", help="Replay at the recorded pace instead of as fast as possible.")
+    parser.add_argument("--jfa", choices=("fragment", "compute"), default=None, help="Override the recorded JFA backend.")
+    parser.add_argument("--csv", metavar="PATH", default=None, help="Write per-frame timings to a CSV file.")
+    args = parser.parse_args()
+
+    recording = InputRecording.load(args.recording)
+    resolution = recording.resolution
+
+    if not args.headless:
+        pygame.display.set_mode(resolution, pygame.OPENGL | pygame.DOUBLEBUF)
+        pygame.display.set_caption("Radiance Cascades Experiments  -  Replay")
+
+    engine = RadianceCascadesEngine(resolution, headless=args.headless)
+
+    if args.jfa == "compute" and not engine.compute_supported:
+        raise SystemExit("Compute shader JFA needs OpenGL 4.3.")
+
+    if args.jfa is None and not engine.compute_supported:
+        for recorded_frame in recording.frames:
+            for event in recorded_frame.events:
+                if isinstance(event, EngineSettings) and event.jfa_compute:
+                    raise SystemExit("Recording uses compute shader JFA which needs OpenGL 4.3, pass --jfa fragment to replay it with the fragment JFA.")
+
+    canvas = SceneCanvas(resolution)
+    canvas.populate(recording.seed)
+
+    timings = []
+    next_frame = perf_counter()
+    for recorded_frame in recording.frames:
+        if args.paced:
+            next_frame += recorded_frame.frame_time
+            sleep(max(next_frame - perf_counter(), 0.0))
+
+        if not args.headless:
+            pygame.event.pump()
+
+        for event in recorded_frame.events:
+            if isinstance(event, KeyEvent):
+                if event.key == pygame.K_c:
+                    canvas.clear()
+
+            elif isinstance(event, StrokeEvent):
+                canvas.stroke(event.start, event.end, event.radius, event.color, event.emissive)
+
+            elif isinstance(event, EngineSettings):
+                event.apply(engine)
+
+        if args.jfa is not None:
+            engine.jfa_compute = args.jfa == "compute"
+
+        _start = perf_counter()
+
+        engine.update_color_scene(canvas.color)
+        engine.update_emissive_scene(canvas.emissive)
+        engine.render()
+
+        # Wait for the GPU so the timing covers the whole frame, not just command submission
+        engine._context.finish()
+        elapsed = perf_counter() - _start
+
+        if not args.headless:
+            pygame.display.flip()
+
+        timings.append(elapsed)
+
+    if len(timings) == 0:
+        print("Recording has no frames.")
+
+    else:
+        ms = sorted(t * 1000.0 for t in timings)
+        print(f"{len(ms)} frames at {resolution[0]}x{resolution[1]} (seed {recording.seed}, {args.jfa or 'recorded'} JFA)")
+        p95 = ms[min(int(len(ms) * 0.95), len(ms) - 1)]
+        print(f"mean: {round(mean(ms), 2)}ms  median: {round(median(ms), 2)}ms  p95: {round(p95, 2)}ms  max: {round(ms[-1], 2)}ms")
+
+    if args.csv is not None:
+        with open(args.csv, "w") as file:
+            file.write("frame,render_ms,recorded_frame_ms\n")
+            for i, (elapsed, recorded_frame) in enumerate(zip(timings, recording.frames)):
+                file.write(f"{i},{elapsed * 1000.0:.4f},{recorded_frame.frame_time * 1000.0:.4f}\n")
+
+    pygame.quit()
@@ -0,0 +1,104 @@
+"""
+
+    Radiance Cascades Experiments
+    https://github.com/kadir014/radiance-cascades-experiments
+
+"""
+
+from random import Random
+
+import pygame
+
+
+class SceneCanvas:
+    """
+    Color & emissive surfaces the scene is painted on.
+
+    Every change to the scene goes through this class so the interactive loop
+    and the replay driver paint exactly the same pixels.
+    """
+
+    def __init__(self, resolution: tuple[int, int]) -> None:
+        """
+        Parameters
+        ----------
+        resolution
+            Resolution in pixels.
+        """
+
+        self.resolution = resolution
+
+        self.color = pygame.Surface(self.resolution, pygame.SRCALPHA)
+        self.emissive = pygame.Surface(self.resolution, pygame.SRCALPHA)
+
+        # Converting needs a display, headless replays use the surfaces as is
+        if pygame.display.get_init() and pygame.display.get_surface() is not None:
+            self.color = self.color.convert_alpha()
+            self.emissive = self.emissive.convert_alpha()
+
+    def populate(self, seed: int, count: int = 100) -> None:
+        """ Scatter random circles, the same seed always gives the same scene. """
+
+        rng = Random(seed)
+
+        for i in range(count):
+            diffuse_color = (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255))
+            pos = (rng.randint(0, self.resolution[0]), rng.randint(0, self.resolution[1]))
+            radius = rng.randint(5, 35)
+
+            pygame.draw.circle(self.color, diffuse_color, pos, radius)
+
+            if rng.randint(0, 1) == 0:
+                pygame.draw.circle(self.emissive, (0, 0, 0, 255), pos, radius)
+
+    def clear(self) -> None:
+        """ Clear both surfaces. """
+
+        self.color.fill((0, 0, 0, 0))
+        self.emissive.fill((0, 0, 0, 0))
+
+    def stroke(self,
+            start: pygame.Vector2,
+            end: pygame.Vector2,
+            radius: float,
+            color: tuple[int, int, int],
+            emissive: bool
+            ) -> None:
+        """
+        Paint a capsule shaped brush stroke.
+
+        Parameters
+        ----------
+        start
+            Stroke start position (current mouse position).
+        end
+            Stroke end position (last mouse position).
+        radius
+            Half-width of the stroke.
+        color
+            Material color.
+        emissive
+            Whether the material is emissive or not.
+        """
+
+        start = pygame.Vector2(start)
+        end = pygame.Vector2(end)
+
+        dir = (end - start).normalize()
+
+        points = (
+            start + dir.rotate(90) * radius,
+            end + dir.rotate(90) * radius,
+            end - dir.rotate(90) * radius,
+            start - dir.rotate(90) * radius
+        )
+
+        pygame.draw.polygon(self.color, color, points, 0)
+        pygame.draw.circle(self.color, color, start, radius)
+        pygame.draw.circle(self.color, color, end, radius)
+
+        if emissive:
+            e = 255
+            pygame.draw.polygon(self.emissive, (0, 0, 0, e), points, 0)
+            pygame.draw.circle(self.emissive, (0, 0, 0, e), start, radius)
+            pygame.draw.circle(self.emissive, (0, 0, 0, e), end, radius)
@@ -5,6 +5,8 @@
 
 """
 
+from typing import Optional
+
 from array import array
 from math import ceil, log2, pow
 
@@ -12,17 +14,47 @@ import pygame
 import moderngl
 
 
+# Length of the JFA offset uniform buffer, enough for 65536 pixel wide scenes
+JFA_MAX_PASSES = 16
+# Stride of the per-pass JFA parameters, largest uniform buffer offset alignment GL allows
+JFA_PASS_STRIDE = 256
+# Last passes (offsets 4, 2 and 1) run in workgroup shared memory, see jfa_local.csh
+JFA_LOCAL_PASSES = 3
+# Workgroup size of the JFA compute shaders
+JFA_TILE = 16
+
+
 class RadianceCascadesEngine:
-    def __init__(self, resolution: tuple[int, int]) -> None:
+    def __init__(self,
+            resolution: tuple[int, int],
+            headless: bool = False
+            ) -> None:
         """
         Parameters
         ----------
         resolution
             Resolution in pixels.
+        headless
+            Create a standalone context and render into an offscreen framebuffer
+            instead of the window.
         """
 
         self.resolution = resolution
-        self._context = moderngl.create_context()
+
+        if headless:
+            # EGL doesn't need a display server, use the default backend (GLX
+            # on Linux) only where EGL isn't available
+            try:
+                self._context = moderngl.create_standalone_context(require=460, backend="egl")
+            except Exception as egl_error:
+                try:
+                    self._context = moderngl.create_standalone_context(require=460)
+                except Exception as error:
+                    raise RuntimeError(
+                        f"Couldn't create a headless context. EGL: {egl_error}  Default backend: {error}"
+                    ) from egl_error
+        else:
+            self._context = moderngl.create_context()
 
         base_vertex_shader = """
         #version 330
@@ -150,8 +182,36 @@ class RadianceCascadesEngine:
         self.stage = 1
         self.jfa_passes = 1
 
-        self._jfa_target0 = self._context.texture(self.resolution, 3, dtype="f4")
-        self._jfa_target1 = self._context.texture(self.resolution, 3, dtype="f4")
+        # Compute shaders need GL 4.3
+        self.compute_supported = self._context.version_code >= 430
+        self.jfa_compute = False
+
+        if self.compute_supported:
+            jfa_defines = {
+                "TILE": JFA_TILE,
+                "LOCAL_PASSES": JFA_LOCAL_PASSES,
+                "MAX_PASSES": JFA_MAX_PASSES
+            }
+
+            self._jfa_seed_shader = self.create_compute_shader("src/shaders/jfa_seed.csh", jfa_defines)
+            self._jfa_seed_shader["s_texture"] = 0
+
+            self._jfa_shader = self.create_compute_shader("src/shaders/jfa.csh", jfa_defines)
+            self._jfa_local_shader = self.create_compute_shader("src/shaders/jfa_local.csh", jfa_defines)
+
+            # Parameters of every pass at JFA_PASS_STRIDE, followed by the offset table of all passes
+            self._jfa_params_ubo = self._context.buffer(reserve=JFA_MAX_PASSES * JFA_PASS_STRIDE + JFA_MAX_PASSES * 16)
+            self._jfa_params_passes = 0
+
+            self._jfa_groups = (
+                ceil(self.resolution[0] / JFA_TILE),
+                ceil(self.resolution[1] / JFA_TILE)
+            )
+
+        # RGBA so the compute JFA can use them as rgba32f images, the fragment
+        # JFA uses the same targets so both backends move the same amount of data
+        self._jfa_target0 = self._context.texture(self.resolution, 4, dtype="f4")
+        self._jfa_target1 = self._context.texture(self.resolution, 4, dtype="f4")
         self._jfa_target0.filter = (moderngl.NEAREST, moderngl.NEAREST)
         self._jfa_target1.filter = (moderngl.NEAREST, moderngl.NEAREST)
         self._jfa_target0.repeat_x = True
@@ -162,8 +222,8 @@ class RadianceCascadesEngine:
         self._jfa_fbo0 = self._context.framebuffer(color_attachments=(self._jfa_target0,))
         self._jfa_fbo1 = self._context.framebuffer(color_attachments=(self._jfa_target1,))
 
-        self._df_target0 = self._context.texture(self.resolution, 3, dtype="f4")
-        self._df_target1 = self._context.texture(self.resolution, 3, dtype="f4")
+        self._df_target0 = self._context.texture(self.resolution, 4, dtype="f4")
+        self._df_target1 = self._context.texture(self.resolution, 4, dtype="f4")
         self._df_target0.filter = (moderngl.NEAREST, moderngl.NEAREST)
         self._df_target1.filter = (moderngl.NEAREST, moderngl.NEAREST)
         self._df0_fbo = self._context.framebuffer(color_attachments=(self._df_target0,))
@@ -173,9 +233,24 @@ class RadianceCascadesEngine:
         self._pt_target.filter = (moderngl.NEAREST, moderngl.NEAREST)
         self._pt_fbo = self._context.framebuffer(color_attachments=(self._pt_target,))
 
+        if headless:
+            self._screen_target = self._context.texture(self.resolution, 3)
+            self._screen = self._context.framebuffer(color_attachments=(self._screen_target,))
+        else:
+            self._screen = self._context.screen
+
     def __del__(self) -> None:
         self._context.release()
 
+    def create_compute_shader(self, path: str, defines: dict) -> moderngl.ComputeShader:
+        """ Create compute shader from file, defining given macros after the version directive. """
+
+        source = open(path).read()
+        version_end = source.index("\n", source.index("#version")) + 1
+        header = "".join(f"#define {name} {value}\n" for name, value in defines.items())
+
+        return self._context.compute_shader(source[:version_end] + header + source[version_end:])
+
     def create_buffer_object(self, data: list) -> moderngl.Buffer:
         """ Create buffer object from array. """
 
@@ -195,23 +270,23 @@ class RadianceCascadesEngine:
     def render(self) -> None:
         """ Render one frame. """
 
-        self._context.screen.use()
-        self._context.clear(0.0, 0.0, 0.0)
+        self._screen.use()
+        self._screen.clear(0.0, 0.0, 0.0)
 
         if self.stage == 1:
-            self._context.screen.use()
+            self._screen.use()
             self.color_scene_texture.use()
             self._display_vao.render()
 
         elif self.stage == 2:
             jfa_out = self._jfa(cap_passes=True)
-            self._context.screen.use()
+            self._screen.use()
             jfa_out.use()
             self._display_vao.render()
 
         elif self.stage == 3:
             self._df()
-            self._context.screen.use()
+            self._screen.use()
             self._df_target0.use()
             self._display_vao.render()
 
@@ -224,7 +299,7 @@ class RadianceCascadesEngine:
             self._df_target1.use(3)
             self._bluenoise_texture.use(4)
             self._pt_vao.render()
-            self._context.screen.use()
+            self._screen.use()
             self._pt_target.use()
             self._display_vao.render()
 
@@ -234,6 +309,14 @@ class RadianceCascadesEngine:
              ) -> moderngl.Texture:
         """ Jump Fill Algorithm. """
 
+        if cap_passes:
+            passes = self.jfa_passes
+        else:
+            passes = ceil(log2(max(self.resolution[0], self.resolution[1])))
+
+        if self.jfa_compute:
+            return self._jfa_compute(passes, inverted)
+
         self._jfa_fbo0.clear(0.0, 0.0, 0.0)
         self._jfa_fbo1.clear(0.0, 0.0, 0.0)
 
@@ -242,11 +325,6 @@ class RadianceCascadesEngine:
         self._seed_program["u_inverted"] = inverted
         self._seed_vao.render()
 
-        if cap_passes:
-            passes = self.jfa_passes
-        else:
-            passes = ceil(log2(max(self.resolution[0], self.resolution[1])))
-
         targets = (self._jfa_target0, self._jfa_target1)
         fbos = (self._jfa_fbo1, self._jfa_fbo0)
 
@@ -267,9 +345,78 @@ class RadianceCascadesEngine:
 
         return output
 
+    def _jfa_compute(self,
+            passes: int,
+            inverted: bool = False,
+            df_target: Optional[moderngl.Texture] = None
+            ) -> moderngl.Texture:
+        """
+        Jump Fill Algorithm with compute shaders.
+
+        Large offset passes are one dispatch each, the last `JFA_LOCAL_PASSES`
+        passes are done in a single dispatch in shared memory. If `df_target`
+        is given, the last dispatch writes the distance field into it directly.
+
+        Pass parameters are only uploaded when the pass count changes, each
+        pass just binds its own range of the parameter buffer.
+        """
+
+        table_offset = JFA_MAX_PASSES * JFA_PASS_STRIDE
+
+        if passes != self._jfa_params_passes:
+            offsets = []
+            for i in range(passes):
+                offset = 1 << (passes - i - 1)
+                self._jfa_params_ubo.write(array("i", (offset, i % 2, 0, 0)), offset=i * JFA_PASS_STRIDE)
+                offsets += [offset, 0, 0, 0]
+            self._jfa_params_ubo.write(array("i", offsets), offset=table_offset)
+            self._jfa_params_passes = passes
+
+        self._jfa_params_ubo.bind_to_uniform_block(1, offset=table_offset, size=JFA_MAX_PASSES * 16)
+
+        self._jfa_target0.bind_to_image(0, read=True, write=True)
+        self._jfa_target1.bind_to_image(1, read=True, write=True)
+
+        self.color_scene_texture.use(0)
+        self._jfa_seed_shader["u_inverted"] = inverted
+        self._jfa_seed_shader.run(*self._jfa_groups)
+        self._context.memory_barrier(moderngl.SHADER_IMAGE_ACCESS_BARRIER_BIT)
+
+        global_passes = max(passes - JFA_LOCAL_PASSES, 0)
+
+        for i in range(global_passes):
+            self._jfa_params_ubo.bind_to_uniform_block(0, offset=i * JFA_PASS_STRIDE, size=16)
+            self._jfa_shader.run(*self._jfa_groups)
+            self._context.memory_barrier(moderngl.SHADER_IMAGE_ACCESS_BARRIER_BIT)
+
+        targets = (self._jfa_target0, self._jfa_target1)
+        current = targets[global_passes % 2]
+
+        if df_target is None:
+            output = targets[(global_passes + 1) % 2]
+        else:
+            output = df_target
+
+        current.bind_to_image(0, read=True, write=False)
+        output.bind_to_image(1, read=False, write=True)
+        self._jfa_local_shader["u_pass"] = global_passes
+        self._jfa_local_shader["u_pass_count"] = passes
+        self._jfa_local_shader["u_write_df"] = df_target is not None
+        self._jfa_local_shader.run(*self._jfa_groups)
+        # Result is sampled by the display & GI shaders next
+        self._context.memory_barrier(moderngl.SHADER_IMAGE_ACCESS_BARRIER_BIT | moderngl.TEXTURE_FETCH_BARRIER_BIT)
+
+        return output
+
     def _df(self) -> None:
         """ Generate distance field from JFA texture. """
 
+        if self.jfa_compute:
+            passes = ceil(log2(max(self.resolution[0], self.resolution[1])))
+            self._jfa_compute(passes, df_target=self._df_target0)
+            self._jfa_compute(passes, inverted=True, df_target=self._df_target1)
+            return
+
         self._df0_fbo.clear()
         self._df1_fbo.clear()
 
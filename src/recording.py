@@ -0,0 +1,281 @@
+"""
+
+    Radiance Cascades Experiments
+    https://github.com/kadir014/radiance-cascades-experiments
+
+"""
+
+from typing import BinaryIO, NamedTuple, Union
+
+import struct
+
+import pygame
+
+from src.engine import RadianceCascadesEngine
+
+
+# Recording format
+# ----------------
+# Everything is little-endian.
+#
+# Header:
+#     4s  magic (b"RCRC")
+#     H   format version
+#     H   width
+#     H   height
+#     I   scene seed
+#
+# Then frames until the end of the file:
+#     f   frame time in seconds
+#     H   event count
+#     ... events
+#
+# Every event starts with an unsigned byte tag followed by its payload.
+
+MAGIC = b"RCRC"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sHHHI")
+_FRAME = struct.Struct("<fH")
+_TAG = struct.Struct("<B")
+
+EVENT_KEY = 0
+EVENT_STROKE = 1
+EVENT_SETTINGS = 2
+
+_KEY = struct.Struct("<i")
+_STROKE = struct.Struct("<5f4B")
+_SETTINGS = struct.Struct("<BBHBBfBB")
+
+
+class KeyEvent(NamedTuple):
+    """ Key press. """
+
+    key: int
+
+
+class StrokeEvent(NamedTuple):
+    """ Brush stroke, see `SceneCanvas.stroke`. """
+
+    start: tuple[float, float]
+    end: tuple[float, float]
+    radius: float
+    color: tuple[int, int, int]
+    emissive: bool
+
+
+class EngineSettings(NamedTuple):
+    """ Engine settings that change the rendering workload. """
+
+    stage: int
+    jfa_passes: int
+    ray_count: int
+    noise_method: int
+    enable_post: bool
+    exposure: float
+    tonemapper: int
+    jfa_compute: bool
+
+    @classmethod
+    def from_engine(cls, engine: RadianceCascadesEngine) -> "EngineSettings":
+        """ Snapshot current settings of the engine. """
+
+        return cls(
+            engine.stage,
+            engine.jfa_passes,
+            engine._pt_program["u_ray_count"].value,
+            engine._pt_program["u_noise_method"].value,
+            bool(engine._display_program["u_enable_post"].value),
+            # Round-trip through f32 so snapshots compare equal to loaded ones
+            struct.unpack("<f", struct.pack("<f", engine._display_program["u_exposure"].value))[0],
+            engine._display_program["u_tonemapper"].value,
+            engine.jfa_compute
+        )
+
+    def apply(self, engine: RadianceCascadesEngine) -> None:
+        """ Apply settings to the engine. """
+
+        engine.stage = self.stage
+        engine.jfa_passes = self.jfa_passes
+        engine._pt_program["u_ray_count"] = self.ray_count
+        engine._pt_program["u_noise_method"] = self.noise_method
+        engine._display_program["u_enable_post"] = self.enable_post
+        engine._display_program["u_exposure"] = self.exposure
+        engine._display_program["u_tonemapper"] = self.tonemapper
+        engine.jfa_compute = self.jfa_compute
+
+
+Event = Union[KeyEvent, StrokeEvent, EngineSettings]
+
+
+class RecordedFrame(NamedTuple):
+    """ Events of one frame, in the order they happened. """
+
+    frame_time: float
+    events: list[Event]
+
+
+class InputRecorder:
+    """
+    Writes per-frame input & settings changes to a recording file.
+
+    Settings are only written on the frames they change.
+    """
+
+    def __init__(self,
+            path: str,
+            resolution: tuple[int, int],
+            seed: int
+            ) -> None:
+        """
+        Parameters
+        ----------
+        path
+            Recording file path.
+        resolution
+            Resolution of the recorded scene in pixels.
+        seed
+            Seed the scene was populated with.
+        """
+
+        self._file = open(path, "wb")
+        self._file.write(_HEADER.pack(MAGIC, VERSION, resolution[0], resolution[1], seed))
+
+        self._events = bytearray()
+        self._event_count = 0
+        self._last_settings = None
+
+    def __enter__(self) -> "InputRecorder":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def key(self, key: int) -> None:
+        """ Record key press. """
+
+        self._events += _TAG.pack(EVENT_KEY) + _KEY.pack(key)
+        self._event_count += 1
+
+    def stroke(self,
+            start: pygame.Vector2,
+            end: pygame.Vector2,
+            radius: float,
+            color: tuple[int, int, int],
+            emissive: bool
+            ) -> None:
+        """ Record brush stroke. """
+
+        self._events += _TAG.pack(EVENT_STROKE) + _STROKE.pack(
+            start[0], start[1], end[0], end[1], radius,
+            color[0], color[1], color[2], emissive
+        )
+        self._event_count += 1
+
+    def settings(self, settings: EngineSettings) -> None:
+        """ Record engine settings if they changed since the last call. """
+
+        if settings == self._last_settings:
+            return
+
+        self._events += _TAG.pack(EVENT_SETTINGS) + _SETTINGS.pack(*settings)
+        self._event_count += 1
+        self._last_settings = settings
+
+    def end_frame(self, frame_time: float) -> None:
+        """ Write events of the current frame. """
+
+        self._file.write(_FRAME.pack(frame_time, self._event_count))
+        self._file.write(self._events)
+
+        self._events.clear()
+        self._event_count = 0
+
+    def close(self) -> None:
+        """ Flush and close the recording file. """
+
+        self._file.close()
+
+
+class InputRecording:
+    """
+    Recording loaded into memory.
+    """
+
+    def __init__(self,
+            resolution: tuple[int, int],
+            seed: int,
+            frames: list[RecordedFrame]
+            ) -> None:
+        """
+        Parameters
+        ----------
+        resolution
+            Resolution of the recorded scene in pixels.
+        seed
+            Seed the scene was populated with.
+        frames
+            Recorded frames.
+        """
+
+        self.resolution = resolution
+        self.seed = seed
+        self.frames = frames
+
+    @classmethod
+    def load(cls, path: str) -> "InputRecording":
+        """ Load recording file. """
+
+        with open(path, "rb") as file:
+            return cls._read(file)
+
+    @classmethod
+    def _read(cls, file: BinaryIO) -> "InputRecording":
+        magic, version, width, height, seed = _HEADER.unpack(_read_exact(file, _HEADER.size))
+
+        if magic != MAGIC:
+            raise ValueError("Not a recording file.")
+
+        if version != VERSION:
+            raise ValueError(f"Unsupported recording version {version}, expected {VERSION}.")
+
+        frames = []
+        while (data := file.read(_FRAME.size)):
+            if len(data) != _FRAME.size:
+                raise ValueError("Truncated recording file.")
+
+            frame_time, event_count = _FRAME.unpack(data)
+
+            events = []
+            for _ in range(event_count):
+                tag = _TAG.unpack(_read_exact(file, _TAG.size))[0]
+
+                if tag == EVENT_KEY:
+                    events.append(KeyEvent(*_KEY.unpack(_read_exact(file, _KEY.size))))
+
+                elif tag == EVENT_STROKE:
+                    sx, sy, ex, ey, radius, r, g, b, emissive = _STROKE.unpack(_read_exact(file, _STROKE.size))
+                    events.append(StrokeEvent((sx, sy), (ex, ey), radius, (r, g, b), bool(emissive)))
+
+                elif tag == EVENT_SETTINGS:
+                    stage, jfa_passes, ray_count, noise_method, enable_post, exposure, tonemapper, jfa_compute = \
+                        _SETTINGS.unpack(_read_exact(file, _SETTINGS.size))
+                    events.append(EngineSettings(
+                        stage, jfa_passes, ray_count, noise_method, bool(enable_post), exposure, tonemapper, bool(jfa_compute)
+                    ))
+
+                else:
+                    raise ValueError(f"Unknown event tag {tag}.")
+
+            frames.append(RecordedFrame(frame_time, events))
+
+        return cls((width, height), seed, frames)
+
+
+def _read_exact(file: BinaryIO, size: int) -> bytes:
+    data = file.read(size)
+
+    if len(data) != size:
+        raise ValueError("Truncated recording file.")
+
+    return data